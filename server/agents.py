@@ -1,34 +1,120 @@
 # server/agents.py
+import asyncio
+import copy
 import random
+import tempfile
 import os
-import base64
+import re
+import binascii
 import requests
-import json
-from typing import Dict, List, Optional
+import hashlib
+import itertools
+import logging
+import mimetypes
+import mmap
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
-def agent_analyze_video(video_path: str) -> Dict:
-    """Analyze video using Gemini API for accident detection"""
-    print(f"[DEBUG] Analyzing video at {video_path}")
-    
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return _mock_video_analysis()
-    
-    try:
-        # Read and encode video file
-        with open(video_path, "rb") as video_file:
-            video_data = base64.b64encode(video_file.read()).decode('utf-8')
-        
-        # Determine MIME type
-        if video_path.endswith('.webm'):
-            mime_type = "video/webm"
-        elif video_path.endswith('.mp4'):
-            mime_type = "video/mp4"
-        else:
-            mime_type = "video/webm"
-        
-        # Structured prompt for accident analysis
-        prompt = """Analyze this video for accident-related information. Respond in this exact JSON format:
+import orjson
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # SIMD (AVX2/NEON) base64 codec, several times faster on large media
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    def _b64encode(data) -> bytes:
+        return binascii.b2a_base64(data, newline=False)
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_ROOT = "https://generativelanguage.googleapis.com"
+GEMINI_MODEL = "gemini-1.5-flash"
+GEMINI_GENERATE_URL = f"{GEMINI_API_ROOT}/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_BATCH_URL = f"{GEMINI_API_ROOT}/v1beta/models/{GEMINI_MODEL}:batchGenerateContent"
+GEMINI_UPLOAD_URL = f"{GEMINI_API_ROOT}/upload/v1beta/files"
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Read once at import, main.py loads .env before importing the agents
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Keep-alive connections held for Gemini, size it to the number of concurrent requests a worker serves
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "32"))
+# Fail fast when the API can't be reached, the read timeouts stay per call
+_CONNECT_TIMEOUT = 5
+
+# Answers worth asking again, anything else from Gemini is final
+_RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# One pooled session for all Gemini traffic so connections are reused between calls,
+# transient 429/5xx answers are retried with backoff
+_gemini_session = requests.Session()
+_gemini_session.mount(GEMINI_API_ROOT, HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=GEMINI_POOL_SIZE,
+    max_retries=Retry(
+        total=3,
+        # A read timeout means the call may have run, replaying it would stall the request and bill the prompt again
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=_RETRYABLE_STATUS,
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False
+    )
+))
+
+# Mock data pools used when Gemini is unavailable, shared across calls
+_MOCK_CARS = (1, 2, 3)
+_MOCK_DAMAGES = (("tire damage",), ("front collision",), ("side damage", "broken glass"), ("scratches", "dents"))
+_MOCK_SEVERITIES = ("minor", "major", "severe")
+_MOCK_LOCATION_TYPES = ("highway", "intersection", "parking lot", "residential street")
+_MOCK_CONCERNS = ((), ("check for injuries",), ("move to safety", "call emergency services"))
+_MOCK_TRANSCRIPTIONS = (
+    "I just had a minor accident on 5th Street. My front bumper is dented but everyone is okay.",
+    "There was a collision at the intersection. No injuries but my car won't start.",
+    "I hit a pothole and now my tire is flat. I'm on the side of Highway 95.",
+)
+
+# Mock responses are sampled once and cycled through, next() on a C iterator needs no lock under the GIL
+_MOCK_ANALYSIS_COUNT = 32
+_rng = random.Random()
+_mock_analyses = itertools.cycle(tuple(
+    (_rng.choice(_MOCK_CARS), _rng.choice(_MOCK_DAMAGES), _rng.choice(_MOCK_SEVERITIES),
+     _rng.choice(_MOCK_LOCATION_TYPES), _rng.choice(_MOCK_CONCERNS))
+    for _ in range(_MOCK_ANALYSIS_COUNT)
+))
+_mock_transcriptions = itertools.cycle(_rng.sample(_MOCK_TRANSCRIPTIONS, len(_MOCK_TRANSCRIPTIONS)))
+
+# Media above this size is sent through the Gemini Files API instead of inline base64
+INLINE_MEDIA_LIMIT = 2 * 1024 * 1024
+
+# Uploaded files expire after 48h on Gemini's side, keep our references a bit shorter
+_UPLOAD_CACHE_SIZE = 64
+_UPLOAD_CACHE_TTL = 47 * 3600
+_uploaded_files: "OrderedDict[tuple, tuple]" = OrderedDict()
+_uploaded_files_lock = threading.Lock()
+
+_VIDEO_MIME_TYPES = {
+    "webm": "video/webm",
+    "mp4": "video/mp4"
+}
+
+_AUDIO_MIME_TYPES = {
+    "webm": "audio/webm",
+    "mp3": "audio/mp3",
+    "wav": "audio/wav",
+    "m4a": "audio/mp4",
+    "ogg": "audio/ogg"
+}
+
+# Fixed prompts, built once and placed first in every request so the shared prefix is identical
+_VIDEO_PROMPT_PART = {"text": """Analyze this video for accident-related information. Respond in this exact JSON format:
 
 {
   "cars_involved": <number: 1 for solo accident, 2 for two-car, 3+ for multi-car>,
@@ -44,71 +130,205 @@ Focus on:
 - Number of vehicles involved
 - Severity assessment (minor = cosmetic/no injury risk, major = significant damage/potential injury, severe = emergency/life-threatening)
 - Location context if visible
-- Any immediate safety concerns"""
+- Any immediate safety concerns"""}
+# Structured output for the video analysis, so the model answers with bare JSON in the accident shape
+_VIDEO_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "OBJECT",
+        "properties": {
+            "cars_involved": {"type": "INTEGER"},
+            "damages": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "severity": {"type": "STRING", "enum": ["minor", "major", "severe"]},
+            "location_type": {"type": "STRING"},
+            "description": {"type": "STRING"},
+            "immediate_concerns": {"type": "ARRAY", "items": {"type": "STRING"}}
+        },
+        "required": ["cars_involved", "damages", "severity", "location_type", "description", "immediate_concerns"]
+    },
+    "temperature": 0.2
+}
+_TRANSCRIBE_PROMPT_PART = {"text": "Please transcribe this audio clearly and accurately. Focus on accident-related details:"}
+
+_TRANSCRIBE_HTTP_ERROR = "Error: Could not transcribe audio"
+_TRANSCRIBE_FAILED_ERROR = "Error: Transcription failed"
+# What a failed transcription returns in place of text, so callers can tell the two apart
+TRANSCRIBE_ERRORS = frozenset({_TRANSCRIBE_HTTP_ERROR, _TRANSCRIBE_FAILED_ERROR})
+
+# Partial-response mask: only the candidate text comes back, no safety ratings or usage metadata
+_TEXT_ONLY_FIELDS = "candidates.content.parts.text"
+
+_BATCH_FINAL_STATES = {"BATCH_STATE_SUCCEEDED", "BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED"}
+
+# Transcriptions keyed by audio content hash, so re-submitted recordings skip the Gemini call
+_transcription_cache = TTLCache(maxsize=1024, ttl=3600)
+_transcription_cache_lock = threading.Lock()
+
+# Video analyses keyed by clip content hash and MIME type, so a re-submitted clip skips inference
+_video_analysis_cache = TTLCache(maxsize=256, ttl=3600)
+_video_analysis_cache_lock = threading.Lock()
+
+# Bounded pool for reading and encoding media so that CPU work stays apart from the network waits
+_encode_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini-encode")
+
+# Read size for streaming base64, a multiple of 3 so encoded chunks concatenate cleanly
+_BASE64_CHUNK = 57 * 1024
+# Below this size a plain read is cheaper than setting up a memory map
+_MMAP_MIN_SIZE = 1024 * 1024
+
+# Stand-in for inline base64 while the rest of a request is serialized
+_INLINE_MEDIA_MARKER = b"@@inline-media@@"
+
+# The text memos keep whole messages as keys and form fields can run to 1 MiB, so longer texts skip them
+_MEMO_MAX_TEXT = 512
+
+def _memo_for(cached, text: str):
+    """The memoized function for a short text, the plain one for a text too long to keep as a cache key"""
+    return cached if len(text) <= _MEMO_MAX_TEXT else cached.__wrapped__
 
+_LOCATION_KEYWORDS = ("where", "nearby", "close", "location", "address", "directions", "map")
+_SERVICE_KEYWORDS = {
+    "tire_shop": ("tire", "flat tire", "puncture", "rim", "wheel"),
+    "tow_truck": ("tow", "towing", "can't drive", "won't start", "stuck"),
+    "mechanic": ("mechanic", "repair", "fix", "engine", "car trouble"),
+    "auto_body_shop": ("body shop", "collision", "dent", "scratch", "paint", "bumper"),
+    "hospital": ("injured", "hurt", "pain", "emergency", "hospital", "doctor"),
+    "police": ("police", "report", "officer", "law enforcement")
+}
+_URGENT_KEYWORDS = ("emergency", "urgent", "asap", "immediately", "help", "stuck")
+_SPECIFIC_REQUEST_KEYWORDS = {
+    "pricing_info": ("cost", "price", "how much"),
+    "insurance_guidance": ("insurance",),
+    "next_steps": ("next step", "what now")
+}
+
+def _keyword_pattern(keywords: Iterable[str]) -> "re.Pattern":
+    """Compile keywords into one alternation that matches anywhere in a string"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+# Location search maps a query to the first service category it mentions
+_QUERY_SERVICE_PATTERNS = (
+    ("tire_shop", _keyword_pattern(["tire", "flat", "puncture", "wheel"])),
+    ("tow_truck", _keyword_pattern(["tow", "towing", "stuck", "won't start", "can't drive"])),
+    ("auto_body_shop", _keyword_pattern(["body", "collision", "dent", "scratch", "paint", "bumper"])),
+    ("hospital", _keyword_pattern(["emergency", "hospital", "injured", "hurt", "medical"])),
+    ("mechanic", _keyword_pattern(["mechanic", "repair", "engine", "brake", "oil"]))
+)
+
+# Decision maker text indicators, severities listed in precedence order
+_TEXT_SEVERITY_KEYWORDS = {
+    "severe": ("emergency", "911", "ambulance", "serious injury", "bleeding", "unconscious", "severe", "hospital"),
+    "major": ("major damage", "can't drive", "won't start", "tow", "significant", "airbag"),
+    "minor": ("minor", "small", "tiny", "little", "scratch", "fender bender")
+}
+_TEXT_CAR_KEYWORDS = {
+    "multi_car": ("other driver", "their car", "two car", "multi", "hit by", "collision with"),
+    "solo_car": ("solo", "alone", "just me", "by myself", "hit a pole", "hit a curb")
+}
+_TEXT_DAMAGE_KEYWORDS = {
+    "tire damage": ("tire", "flat", "puncture", "rim", "blew out"),
+    "engine damage": ("won't start", "engine", "smoke", "steam", "overheating"),
+    "body damage": ("dent", "scratch", "bumper", "door", "fender", "body"),
+    "glass damage": ("windshield", "window", "glass", "cracked"),
+    "fluid leak": ("leak", "oil", "coolant", "fluid")
+}
+
+# Conversational fallbacks, matched as substrings like the other keyword groups
+_THANKS_WORDS = ("thank", "thanks")
+_HELP_WORDS = ("help", "what", "how")
+
+def agent_analyze_video(video_path: str, video_data: Optional[bytes] = None) -> Dict:
+    """Analyze video using Gemini API for accident detection, from video_data when given (video_path then only names it)"""
+    logger.debug("Analyzing video at %s", video_path)
+    
+    api_key = GEMINI_API_KEY
+    if not api_key:
+        return _mock_video_analysis()
+    
+    try:
+        # Determine MIME type
+        mime_type = _VIDEO_MIME_TYPES.get(video_path.rpartition(".")[2].lower(), "video/webm")
+        
+        # Clips already held in memory are hashed and encoded from there, never read back from disk
+        media = video_path if video_data is None else video_data
+        digest = _media_digest(media)
+        with _video_analysis_cache_lock:
+            cached = _video_analysis_cache.get((digest, mime_type))
+        if cached is not None:
+            logger.debug("Video analysis cache hit for %s", digest)
+            return copy.deepcopy(cached)
+        
+        # Large clips on disk go through the Files API, smaller ones are spliced into the body in chunks
+        file_uri = None
+        if video_data is None and os.path.getsize(video_path) > INLINE_MEDIA_LIMIT:
+            file_uri = _upload_to_gemini(video_path, mime_type, api_key, digest)
+        
+        if file_uri:
+            media_part = {"file_data": {"mime_type": mime_type, "file_uri": file_uri}}
+        else:
+            media_part = {"inline_data": {"mime_type": mime_type, "data": _INLINE_MEDIA_MARKER.decode("ascii")}}
+        
         payload = {
             "contents": [{
                 "parts": [
-                    {"text": prompt},
-                    {
-                        "inline_data": {
-                            "mime_type": mime_type,
-                            "data": video_data
-                        }
-                    }
+                    _VIDEO_PROMPT_PART,
+                    media_part
                 ]
-            }]
+            }],
+            "generation_config": _VIDEO_GENERATION_CONFIG
         }
         
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-        response = requests.post(url, headers={"Content-Type": "application/json"}, json=payload, timeout=45)
+        response = _gemini_session.post(GEMINI_GENERATE_URL, params={"key": api_key}, headers=_JSON_HEADERS, data=_serialize_request(payload, media), timeout=(_CONNECT_TIMEOUT, 45))
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             analysis_text = result["candidates"][0]["content"]["parts"][0]["text"]
             
-            # Extract JSON from response
+            # The response schema makes the text itself the JSON document
             try:
-                # Clean the response to extract JSON
-                json_start = analysis_text.find('{')
-                json_end = analysis_text.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    json_str = analysis_text[json_start:json_end]
-                    analysis = json.loads(json_str)
-                    print(f"[DEBUG] Gemini video analysis: {analysis}")
-                    return analysis
-                else:
-                    print(f"[ERROR] Could not extract JSON from Gemini response: {analysis_text}")
-                    return _mock_video_analysis()
-            except json.JSONDecodeError as e:
-                print(f"[ERROR] JSON decode error: {e}")
-                print(f"[DEBUG] Raw response: {analysis_text}")
+                analysis = orjson.loads(analysis_text)
+            except orjson.JSONDecodeError as e:
+                logger.error("JSON decode error: %s", e)
+                logger.debug("Raw response: %s", analysis_text)
                 return _mock_video_analysis()
+            
+            logger.debug("Gemini video analysis: %s", analysis)
+            with _video_analysis_cache_lock:
+                _video_analysis_cache[(digest, mime_type)] = analysis
+            return copy.deepcopy(analysis)
                 
         else:
-            print(f"[ERROR] Gemini API error: {response.status_code} - {response.text}")
+            logger.error("Gemini API error: %s - %s", response.status_code, response.text)
             return _mock_video_analysis()
             
     except Exception as e:
-        print(f"[ERROR] Video analysis failed: {e}")
+        logger.error("Video analysis failed: %s", e)
         return _mock_video_analysis()
 
+async def agent_analyze_video_async(video_path: str, video_data: Optional[bytes] = None) -> Dict:
+    """Analyze video in a worker thread so the event loop stays free"""
+    return await asyncio.to_thread(agent_analyze_video, video_path, video_data)
+
 def _mock_video_analysis() -> Dict:
     """Fallback mock analysis"""
+    cars_involved, damages, severity, location_type, concerns = next(_mock_analyses)
     mock_response = {
-        "cars_involved": random.choice([1, 2, 3]),
-        "damages": random.choice([["tire damage"], ["front collision"], ["side damage", "broken glass"], ["scratches", "dents"]]),
-        "severity": random.choice(["minor", "major", "severe"]),
-        "location_type": random.choice(["highway", "intersection", "parking lot", "residential street"]),
+        "cars_involved": cars_involved,
+        "damages": list(damages),
+        "severity": severity,
+        "location_type": location_type,
         "description": "Mock analysis - could not process video with Gemini",
-        "immediate_concerns": random.choice([[], ["check for injuries"], ["move to safety", "call emergency services"]])
+        "immediate_concerns": list(concerns)
     }
-    print(f"[DEBUG] Mock video analysis: {mock_response}")
+    logger.debug("Mock video analysis: %s", mock_response)
     return mock_response
 
 def agent_analyze_text(text_input: str) -> Dict:
     """Analyze text input for additional context"""
-    print(f"[DEBUG] Text received: {text_input}")
+    if not text_input:
+        return {"note": "", "length": 0, "has_content": False}
+    
+    logger.debug("Text received: %s", text_input)
     return {
         "note": text_input,
         "length": len(text_input),
@@ -117,8 +337,24 @@ def agent_analyze_text(text_input: str) -> Dict:
 
 def agent_intelligent_query_analyzer(message: str, context: Dict = None) -> Dict:
     """Analyze user query to determine what information and services they need"""
+    # The context only matters through the damage and severity fallback, so that is all the memo key keeps
+    context_key = _query_context_key((context.get("analysis") or {}).get("final_assessment") or {}) if context else None
+    
     message_lower = message.lower()
+    analysis = _memo_for(_analyze_query, message_lower)(message_lower, context_key)
+    logger.debug("Query analysis: %s", analysis)
     
+    # Callers get lists of their own, the memo entry behind them must stay as it was computed
+    return {key: list(value) if isinstance(value, list) else value for key, value in analysis.items()}
+
+def _query_context_key(final_assessment: Dict) -> tuple:
+    """Reduce an assessment to the (tire damage, severity) pair the query fallback looks at"""
+    has_tire_damage = any("tire" in str(damage).lower() for damage in final_assessment.get("damages") or [])
+    return (has_tire_damage, final_assessment.get("severity", "minor"))
+
+@lru_cache(maxsize=512)
+def _analyze_query(message_lower: str, context_key: Optional[tuple]) -> Dict:
+    """Classify a lowercased query, falling back to the (tire damage, severity) context when no service is named"""
     analysis = {
         "needs_location_search": False,
         "search_types": [],
@@ -127,35 +363,22 @@ def agent_intelligent_query_analyzer(message: str, context: Dict = None) -> Dict
         "specific_requests": []
     }
     
-    # Location-related keywords
-    location_keywords = ["where", "nearby", "close", "location", "address", "directions", "map"]
-    service_keywords = {
-        "tire_shop": ["tire", "flat tire", "puncture", "rim", "wheel"],
-        "tow_truck": ["tow", "towing", "can't drive", "won't start", "stuck"],
-        "mechanic": ["mechanic", "repair", "fix", "engine", "car trouble"],
-        "auto_body_shop": ["body shop", "collision", "dent", "scratch", "paint", "bumper"],
-        "hospital": ["injured", "hurt", "pain", "emergency", "hospital", "doctor"],
-        "police": ["police", "report", "officer", "law enforcement"]
-    }
-    
     # Check if they need location services
-    if any(keyword in message_lower for keyword in location_keywords):
+    if any(keyword in message_lower for keyword in _LOCATION_KEYWORDS):
         analysis["needs_location_search"] = True
         analysis["intent"] = "location_request"
     
     # Determine what type of services they need
-    for service_type, keywords in service_keywords.items():
+    for service_type, keywords in _SERVICE_KEYWORDS.items():
         if any(keyword in message_lower for keyword in keywords):
             analysis["search_types"].append(service_type)
             analysis["needs_location_search"] = True
     
     # If no specific service mentioned, infer from context
-    if not analysis["search_types"] and context:
-        final_assessment = context.get("analysis", {}).get("final_assessment", {})
-        damages = final_assessment.get("damages", [])
-        severity = final_assessment.get("severity", "minor")
+    if not analysis["search_types"] and context_key:
+        has_tire_damage, severity = context_key
         
-        if any("tire" in str(damage).lower() for damage in damages):
+        if has_tire_damage:
             analysis["search_types"].append("tire_shop")
         elif severity == "severe":
             analysis["search_types"].extend(["hospital", "tow_truck"])
@@ -165,167 +388,169 @@ def agent_intelligent_query_analyzer(message: str, context: Dict = None) -> Dict
             analysis["search_types"].append("mechanic")
     
     # Determine urgency
-    urgent_keywords = ["emergency", "urgent", "asap", "immediately", "help", "stuck"]
-    if any(keyword in message_lower for keyword in urgent_keywords):
+    if any(keyword in message_lower for keyword in _URGENT_KEYWORDS):
         analysis["urgency"] = "urgent"
     
     # Check for specific requests
-    if "cost" in message_lower or "price" in message_lower or "how much" in message_lower:
-        analysis["specific_requests"].append("pricing_info")
-    if "insurance" in message_lower:
-        analysis["specific_requests"].append("insurance_guidance")
-    if "next step" in message_lower or "what now" in message_lower:
-        analysis["specific_requests"].append("next_steps")
-    
-    print(f"[DEBUG] Query analysis: {analysis}")
+    for request_type, keywords in _SPECIFIC_REQUEST_KEYWORDS.items():
+        if any(keyword in message_lower for keyword in keywords):
+            analysis["specific_requests"].append(request_type)
+    
     return analysis
 
+# Comprehensive service database with precise coordinates for mapping
+_MIAMI_SERVICES_DB = {
+    "tire_shop": [
+        {
+            "id": "tire_kingdom_sw8", "name": "Tire Kingdom", "distance": "1.8 miles", "rating": 4.2,
+            "coordinates": {"lat": 25.789, "lng": -80.210}, "type": "tire_shop",
+            "phone": "(305) 555-0123", "address": "2500 SW 8th St, Miami, FL 33135",
+            "hours": "Mon-Sat 8AM-6PM, Sun 9AM-5PM",
+            "services": ["tire replacement", "wheel alignment", "tire repair"],
+            "price_range": "$80-$300", "wait_time": "30-60 minutes",
+            "map_ready": True
+        },
+        {
+            "id": "costco_tire_flagler", "name": "Costco Tire Center", "distance": "3.2 miles", "rating": 4.5,
+            "coordinates": {"lat": 25.750, "lng": -80.255}, "type": "tire_shop",
+            "phone": "(305) 555-0456", "address": "7795 W Flagler St, Miami, FL 33144",
+            "hours": "Mon-Fri 10AM-8PM, Sat 9:30AM-6PM, Sun 10AM-6PM",
+            "services": ["tire installation", "road hazard warranty", "tire rotation"],
+            "price_range": "$100-$400", "wait_time": "45-90 minutes",
+            "map_ready": True
+        },
+        {
+            "id": "discount_tire_sw40", "name": "Discount Tire", "distance": "4.1 miles", "rating": 4.3,
+            "coordinates": {"lat": 25.731, "lng": -80.268}, "type": "tire_shop",
+            "phone": "(305) 555-0789", "address": "8901 SW 40th St, Miami, FL 33165",
+            "hours": "Mon-Fri 8AM-6PM, Sat 8AM-5PM",
+            "services": ["tire replacement", "flat repair", "tire balancing"],
+            "price_range": "$90-$350", "wait_time": "20-45 minutes",
+            "map_ready": True
+        }
+    ],
+    "tow_truck": [
+        {
+            "id": "tremont_towing_dispatch", "name": "Tremont Towing", "distance": "2.1 miles", "rating": 4.0,
+            "coordinates": {"lat": 25.774, "lng": -80.193}, "type": "tow_truck",
+            "phone": "(305) 555-0789", "address": "Dispatch: 1520 NW 7th St, Miami, FL 33125",
+            "hours": "24/7 Emergency Service",
+            "services": ["emergency towing", "roadside assistance", "jump start"],
+            "price_range": "$75-$150", "wait_time": "15-30 minutes",
+            "map_ready": True
+        },
+        {
+            "id": "usa_towing_nw36", "name": "USA Towing", "distance": "3.5 miles", "rating": 3.8,
+            "coordinates": {"lat": 25.810, "lng": -80.208}, "type": "tow_truck", 
+            "phone": "(305) 555-1234", "address": "3501 NW 36th St, Miami, FL 33142",
+            "hours": "24/7",
+            "services": ["heavy duty towing", "accident recovery", "lockout service"],
+            "price_range": "$85-$200", "wait_time": "20-45 minutes",
+            "map_ready": True
+        }
+    ],
+    "auto_body_shop": [
+        {
+            "id": "caliber_collision_nw27", "name": "Caliber Collision", "distance": "2.8 miles", "rating": 4.4,
+            "coordinates": {"lat": 25.795, "lng": -80.224}, "type": "auto_body_shop",
+            "phone": "(305) 555-2468", "address": "2900 NW 27th Ave, Miami, FL 33142",
+            "hours": "Mon-Fri 7:30AM-5:30PM",
+            "services": ["collision repair", "paint work", "insurance claims"],
+            "price_range": "$500-$5000+", "wait_time": "3-7 days",
+            "map_ready": True
+        },
+        {
+            "id": "joes_auto_body_sw40", "name": "Joe's Auto Body", "distance": "4.1 miles", "rating": 4.1,
+            "coordinates": {"lat": 25.728, "lng": -80.261}, "type": "auto_body_shop",
+            "phone": "(305) 555-3691", "address": "6700 SW 40th St, Miami, FL 33155",
+            "hours": "Mon-Fri 8AM-5PM, Sat 9AM-1PM",
+            "services": ["dent repair", "frame straightening", "custom paint"],
+            "price_range": "$300-$4000+", "wait_time": "2-5 days",
+            "map_ready": True
+        }
+    ],
+    "mechanic": [
+        {
+            "id": "pep_boys_sw22", "name": "Pep Boys", "distance": "1.2 miles", "rating": 3.9,
+            "coordinates": {"lat": 25.761, "lng": -80.218}, "type": "mechanic",
+            "phone": "(305) 555-4812", "address": "1250 SW 22nd St, Miami, FL 33145",
+            "hours": "Mon-Sat 8AM-8PM, Sun 9AM-6PM",
+            "services": ["oil change", "brake service", "engine diagnostics"],
+            "price_range": "$50-$800", "wait_time": "30 minutes-2 hours",
+            "map_ready": True
+        },
+        {
+            "id": "gus_garage_sw32", "name": "Gus's Garage", "distance": "2.8 miles", "rating": 4.6,
+            "coordinates": {"lat": 25.739, "lng": -80.245}, "type": "mechanic",
+            "phone": "(305) 555-5925", "address": "3050 SW 32nd Ave, Miami, FL 33133",
+            "hours": "Mon-Fri 7AM-6PM, Sat 8AM-4PM",
+            "services": ["engine repair", "transmission", "electrical work"],
+            "price_range": "$75-$1200", "wait_time": "1-3 hours",
+            "map_ready": True
+        }
+    ],
+    "hospital": [
+        {
+            "id": "jackson_memorial_main", "name": "Jackson Memorial Hospital", "distance": "3.8 miles", "rating": 4.2,
+            "coordinates": {"lat": 25.798, "lng": -80.214}, "type": "hospital",
+            "phone": "911 or (305) 585-1111", "address": "1611 NW 12th Ave, Miami, FL 33136",
+            "hours": "24/7 Emergency Room",
+            "services": ["emergency care", "trauma center", "surgery"],
+            "price_range": "Contact insurance", "wait_time": "Varies by severity",
+            "map_ready": True
+        },
+         {
+            "id": "mercy_hospital_south", "name": "Mercy Hospital", "distance": "4.5 miles", "rating": 4.0,
+            "coordinates": {"lat": 25.742, "lng": -80.212}, "type": "hospital",
+            "phone": "911 or (305) 854-4400", "address": "3663 S Miami Ave, Miami, FL 33133",
+            "hours": "24/7 Emergency Department",
+            "services": ["emergency medicine", "urgent care", "imaging"],
+            "price_range": "Insurance dependent", "wait_time": "Based on triage",
+            "map_ready": True
+        }
+    ]
+}
+
 def agent_location_search(query: str, location: str = "Miami, FL") -> Dict:
     """Enhanced location search with properly structured map data for frontend consumption"""
-    print(f"[DEBUG] Location search for '{query}' near {location}")
-    
-    # Comprehensive service database with precise coordinates for mapping
-    miami_services_db = {
-        "tire_shop": [
-            {
-                "id": "tire_kingdom_sw8", "name": "Tire Kingdom", "distance": "1.8 miles", "rating": 4.2,
-                "coordinates": {"lat": 25.789, "lng": -80.210}, "type": "tire_shop",
-                "phone": "(305) 555-0123", "address": "2500 SW 8th St, Miami, FL 33135",
-                "hours": "Mon-Sat 8AM-6PM, Sun 9AM-5PM",
-                "services": ["tire replacement", "wheel alignment", "tire repair"],
-                "price_range": "$80-$300", "wait_time": "30-60 minutes",
-                "map_ready": True
-            },
-            {
-                "id": "costco_tire_flagler", "name": "Costco Tire Center", "distance": "3.2 miles", "rating": 4.5,
-                "coordinates": {"lat": 25.750, "lng": -80.255}, "type": "tire_shop",
-                "phone": "(305) 555-0456", "address": "7795 W Flagler St, Miami, FL 33144",
-                "hours": "Mon-Fri 10AM-8PM, Sat 9:30AM-6PM, Sun 10AM-6PM",
-                "services": ["tire installation", "road hazard warranty", "tire rotation"],
-                "price_range": "$100-$400", "wait_time": "45-90 minutes",
-                "map_ready": True
-            },
-            {
-                "id": "discount_tire_sw40", "name": "Discount Tire", "distance": "4.1 miles", "rating": 4.3,
-                "coordinates": {"lat": 25.731, "lng": -80.268}, "type": "tire_shop",
-                "phone": "(305) 555-0789", "address": "8901 SW 40th St, Miami, FL 33165",
-                "hours": "Mon-Fri 8AM-6PM, Sat 8AM-5PM",
-                "services": ["tire replacement", "flat repair", "tire balancing"],
-                "price_range": "$90-$350", "wait_time": "20-45 minutes",
-                "map_ready": True
-            }
-        ],
-        "tow_truck": [
-            {
-                "id": "tremont_towing_dispatch", "name": "Tremont Towing", "distance": "2.1 miles", "rating": 4.0,
-                "coordinates": {"lat": 25.774, "lng": -80.193}, "type": "tow_truck",
-                "phone": "(305) 555-0789", "address": "Dispatch: 1520 NW 7th St, Miami, FL 33125",
-                "hours": "24/7 Emergency Service",
-                "services": ["emergency towing", "roadside assistance", "jump start"],
-                "price_range": "$75-$150", "wait_time": "15-30 minutes",
-                "map_ready": True
-            },
-            {
-                "id": "usa_towing_nw36", "name": "USA Towing", "distance": "3.5 miles", "rating": 3.8,
-                "coordinates": {"lat": 25.810, "lng": -80.208}, "type": "tow_truck", 
-                "phone": "(305) 555-1234", "address": "3501 NW 36th St, Miami, FL 33142",
-                "hours": "24/7",
-                "services": ["heavy duty towing", "accident recovery", "lockout service"],
-                "price_range": "$85-$200", "wait_time": "20-45 minutes",
-                "map_ready": True
-            }
-        ],
-        "auto_body_shop": [
-            {
-                "id": "caliber_collision_nw27", "name": "Caliber Collision", "distance": "2.8 miles", "rating": 4.4,
-                "coordinates": {"lat": 25.795, "lng": -80.224}, "type": "auto_body_shop",
-                "phone": "(305) 555-2468", "address": "2900 NW 27th Ave, Miami, FL 33142",
-                "hours": "Mon-Fri 7:30AM-5:30PM",
-                "services": ["collision repair", "paint work", "insurance claims"],
-                "price_range": "$500-$5000+", "wait_time": "3-7 days",
-                "map_ready": True
-            },
-            {
-                "id": "joes_auto_body_sw40", "name": "Joe's Auto Body", "distance": "4.1 miles", "rating": 4.1,
-                "coordinates": {"lat": 25.728, "lng": -80.261}, "type": "auto_body_shop",
-                "phone": "(305) 555-3691", "address": "6700 SW 40th St, Miami, FL 33155",
-                "hours": "Mon-Fri 8AM-5PM, Sat 9AM-1PM",
-                "services": ["dent repair", "frame straightening", "custom paint"],
-                "price_range": "$300-$4000+", "wait_time": "2-5 days",
-                "map_ready": True
-            }
-        ],
-        "mechanic": [
-            {
-                "id": "pep_boys_sw22", "name": "Pep Boys", "distance": "1.2 miles", "rating": 3.9,
-                "coordinates": {"lat": 25.761, "lng": -80.218}, "type": "mechanic",
-                "phone": "(305) 555-4812", "address": "1250 SW 22nd St, Miami, FL 33145",
-                "hours": "Mon-Sat 8AM-8PM, Sun 9AM-6PM",
-                "services": ["oil change", "brake service", "engine diagnostics"],
-                "price_range": "$50-$800", "wait_time": "30 minutes-2 hours",
-                "map_ready": True
-            },
-            {
-                "id": "gus_garage_sw32", "name": "Gus's Garage", "distance": "2.8 miles", "rating": 4.6,
-                "coordinates": {"lat": 25.739, "lng": -80.245}, "type": "mechanic",
-                "phone": "(305) 555-5925", "address": "3050 SW 32nd Ave, Miami, FL 33133",
-                "hours": "Mon-Fri 7AM-6PM, Sat 8AM-4PM",
-                "services": ["engine repair", "transmission", "electrical work"],
-                "price_range": "$75-$1200", "wait_time": "1-3 hours",
-                "map_ready": True
-            }
-        ],
-        "hospital": [
-            {
-                "id": "jackson_memorial_main", "name": "Jackson Memorial Hospital", "distance": "3.8 miles", "rating": 4.2,
-                "coordinates": {"lat": 25.798, "lng": -80.214}, "type": "hospital",
-                "phone": "911 or (305) 585-1111", "address": "1611 NW 12th Ave, Miami, FL 33136",
-                "hours": "24/7 Emergency Room",
-                "services": ["emergency care", "trauma center", "surgery"],
-                "price_range": "Contact insurance", "wait_time": "Varies by severity",
-                "map_ready": True
-            },
-             {
-                "id": "mercy_hospital_south", "name": "Mercy Hospital", "distance": "4.5 miles", "rating": 4.0,
-                "coordinates": {"lat": 25.742, "lng": -80.212}, "type": "hospital",
-                "phone": "911 or (305) 854-4400", "address": "3663 S Miami Ave, Miami, FL 33133",
-                "hours": "24/7 Emergency Department",
-                "services": ["emergency medicine", "urgent care", "imaging"],
-                "price_range": "Insurance dependent", "wait_time": "Based on triage",
-                "map_ready": True
-            }
-        ]
-    }
+    logger.debug("Location search for '%s' near %s", query, location)
     
-    # Map query to service type with better matching
-    query_lower = query.lower()
-    service_key = "mechanic"  # Default
+    # The results are prebuilt per service type, only the query and location vary between callers
+    result = _SERVICE_RESULTS[_service_type_for(query.lower())]
     
-    if any(word in query_lower for word in ["tire", "flat", "puncture", "wheel"]):
-        service_key = "tire_shop"
-    elif any(word in query_lower for word in ["tow", "towing", "stuck", "won't start", "can't drive"]):
-        service_key = "tow_truck"
-    elif any(word in query_lower for word in ["body", "collision", "dent", "scratch", "paint", "bumper"]):
-        service_key = "auto_body_shop"
-    elif any(word in query_lower for word in ["emergency", "hospital", "injured", "hurt", "medical"]):
-        service_key = "hospital"
-    elif any(word in query_lower for word in ["mechanic", "repair", "engine", "brake", "oil"]):
-        service_key = "mechanic"
+    # Callers annotate the service entries, so hand out copies rather than the shared dicts
+    return {
+        "query": query,
+        "location": location,
+        **result,
+        "services": [dict(service) for service in result["services"]]
+    }
 
-    services = miami_services_db.get(service_key, miami_services_db["mechanic"])
-    
+def _service_result(service_key: str, services: List[Dict]) -> Dict:
+    """Build the query-independent part of a location search result for one service type"""
     # Calculate map bounds for frontend
     if services:
-        lats = [s["coordinates"]["lat"] for s in services]
-        lngs = [s["coordinates"]["lng"] for s in services]
+        # One pass over the coordinates for all four extremes
+        north = south = services[0]["coordinates"]["lat"]
+        east = west = services[0]["coordinates"]["lng"]
+        for service in services[1:]:
+            lat, lng = service["coordinates"]["lat"], service["coordinates"]["lng"]
+            if lat > north:
+                north = lat
+            elif lat < south:
+                south = lat
+            if lng > east:
+                east = lng
+            elif lng < west:
+                west = lng
         bounds = {
-            "north": max(lats) + 0.01,
-            "south": min(lats) - 0.01,
-            "east": max(lngs) + 0.01,
-            "west": min(lngs) - 0.01
+            "north": north + 0.01,
+            "south": south - 0.01,
+            "east": east + 0.01,
+            "west": west - 0.01
         }
-        center_lat = (max(lats) + min(lats)) / 2
-        center_lng = (max(lngs) + min(lngs)) / 2
+        center_lat = (north + south) / 2
+        center_lng = (east + west) / 2
     else:
         bounds = {
             "north": 25.85, "south": 25.65,
@@ -334,8 +559,6 @@ def agent_location_search(query: str, location: str = "Miami, FL") -> Dict:
         center_lat, center_lng = 25.7617, -80.1918
     
     return {
-        "query": query,
-        "location": location,
         "service_type": service_key,
         "services": services,
         "total_found": len(services),
@@ -356,17 +579,37 @@ def agent_location_search(query: str, location: str = "Miami, FL") -> Dict:
         }
     }
 
+# The services never change, so the map data for every service type is worked out once at import
+_SERVICE_RESULTS = {key: _service_result(key, services) for key, services in _MIAMI_SERVICES_DB.items()}
+
+@lru_cache(maxsize=512)
+def _service_type_for(query_lower: str) -> str:
+    """Map a lowercased query to the service type it asks for"""
+    for category, pattern in _QUERY_SERVICE_PATTERNS:
+        if pattern.search(query_lower):
+            return category
+    return "mechanic"  # Default
+
 def agent_decision_maker(video_analysis: Dict, text_analysis: Dict, location_info: Dict = None) -> Dict:
     """Enhanced decision maker that prioritizes text input and provides comprehensive recommendations"""
-    print(f"[DEBUG] Enhanced decision making with video={video_analysis}, text={text_analysis}")
+    logger.debug("Enhanced decision making with video=%s, text=%s", video_analysis, text_analysis)
     
-    # Extract data
-    video_severity = video_analysis.get("severity", "minor")
-    video_cars_involved = video_analysis.get("cars_involved", 1)
-    video_damages = video_analysis.get("damages", [])
+    # Reduce the inputs to the fields the decision depends on, so repeated assessments hit the memo
+    text_content = text_analysis.get("note", "").lower() if text_analysis.get("has_content", False) else ""
+    decision = _memo_for(_decide, text_content)(
+        video_analysis.get("severity", "minor"),
+        video_analysis.get("cars_involved", 1),
+        tuple(video_analysis.get("damages", [])),
+        text_content
+    )
     
-    text_content = text_analysis.get("note", "").lower()
-    text_has_content = text_analysis.get("has_content", False)
+    # Copying the lists is enough, the recommendation dicts inside them are only ever read
+    return {key: list(value) if isinstance(value, list) else value for key, value in decision.items()}
+
+@lru_cache(maxsize=128)
+def _decide(video_severity: str, video_cars_involved: int, video_damages: tuple, text_content: str) -> Dict:
+    """Build the assessment and recommendations from the normalized video and text signals"""
+    text_has_content = bool(text_content)
     
     # TEXT TAKES PRECEDENCE
     final_severity = video_severity
@@ -376,38 +619,25 @@ def agent_decision_maker(video_analysis: Dict, text_analysis: Dict, location_inf
     
     if text_has_content:
         # Text severity indicators
-        if any(word in text_content for word in ["emergency", "911", "ambulance", "serious injury", "bleeding", "unconscious", "severe", "hospital"]):
-            final_severity = "severe"
-            text_override_applied = True
-        elif any(word in text_content for word in ["major damage", "can't drive", "won't start", "tow", "significant", "airbag"]):
-            final_severity = "major"
-            text_override_applied = True
-        elif any(word in text_content for word in ["minor", "small", "tiny", "little", "scratch", "fender bender"]):
-            final_severity = "minor"
-            text_override_applied = True
+        for severity, keywords in _TEXT_SEVERITY_KEYWORDS.items():
+            if any(word in text_content for word in keywords):
+                final_severity = severity
+                text_override_applied = True
+                break
         
         # Text car involvement indicators
-        if any(word in text_content for word in ["other driver", "their car", "two car", "multi", "hit by", "collision with"]):
+        if any(word in text_content for word in _TEXT_CAR_KEYWORDS["multi_car"]):
             final_cars_involved = max(2, final_cars_involved)
             text_override_applied = True
-        elif any(word in text_content for word in ["solo", "alone", "just me", "by myself", "hit a pole", "hit a curb"]):
+        elif any(word in text_content for word in _TEXT_CAR_KEYWORDS["solo_car"]):
             final_cars_involved = 1
             text_override_applied = True
         
         # Text damage indicators (add to video damages)
-        text_damage_indicators = {
-            "tire damage": ["tire", "flat", "puncture", "rim", "blew out"],
-            "engine damage": ["won't start", "engine", "smoke", "steam", "overheating"],
-            "body damage": ["dent", "scratch", "bumper", "door", "fender", "body"],
-            "glass damage": ["windshield", "window", "glass", "cracked"],
-            "fluid leak": ["leak", "oil", "coolant", "fluid"]
-        }
-        
-        for damage_type, keywords in text_damage_indicators.items():
-            if any(keyword in text_content for keyword in keywords):
-                if damage_type not in final_damages:
-                    final_damages.append(damage_type)
-                    text_override_applied = True
+        for damage_type, keywords in _TEXT_DAMAGE_KEYWORDS.items():
+            if damage_type not in final_damages and any(keyword in text_content for keyword in keywords):
+                final_damages.append(damage_type)
+                text_override_applied = True
 
     # Generate summaries and explanations
     overview_summary = f"I've analyzed a {final_severity} incident involving {final_cars_involved} vehicle(s)."
@@ -426,6 +656,9 @@ def agent_decision_maker(video_analysis: Dict, text_analysis: Dict, location_inf
     else:
         detailed_explanation += "No specific external damages were immediately obvious, but internal issues could still exist."
 
+    # Lowercase the damages once, both the minor-incident advice and the tips check them for tires
+    has_tire_damage = any("tire" in str(d).lower() for d in final_damages)
+
     # Determine priority, advice, and recommendations
     priority = "low"
     location_recommendations = []
@@ -468,7 +701,6 @@ def agent_decision_maker(video_analysis: Dict, text_analysis: Dict, location_inf
         ]
     else: # minor
         priority = "medium"
-        has_tire_damage = any("tire" in str(d).lower() for d in final_damages)
         
         if has_tire_damage:
             immediate_actions = [
@@ -492,13 +724,13 @@ def agent_decision_maker(video_analysis: Dict, text_analysis: Dict, location_inf
         ]
         location_recommendations.append({"type": "mechanic", "reason": "Even minor incidents can cause hidden damage.", "priority": "soon"})
     
-    comprehensive_tips = _generate_comprehensive_tips(final_severity, final_damages, final_cars_involved)
+    comprehensive_tips = _generate_comprehensive_tips(final_severity, has_tire_damage, final_cars_involved)
 
     return {
         "priority": priority,
         "severity": final_severity,
         "cars_involved": final_cars_involved,
-        "damages": list(set(final_damages)), # a unique list
+        "damages": list(dict.fromkeys(final_damages)), # a unique list, in detection order
         "text_override_applied": text_override_applied,
         "overview_summary": overview_summary,
         "detailed_explanation": detailed_explanation,
@@ -508,8 +740,8 @@ def agent_decision_maker(video_analysis: Dict, text_analysis: Dict, location_inf
         "comprehensive_tips": comprehensive_tips
     }
 
-def _generate_comprehensive_tips(severity: str, damages: List[str], cars_involved: int) -> List[str]:
-    """Generate comprehensive, actionable tips based on the full situation analysis"""
+def _build_tips(multiple_cars: bool, tire_damage: bool, serious: bool) -> tuple:
+    """Assemble the tips for one combination of the situation flags"""
     tips = []
     
     # Documentation tips
@@ -518,16 +750,16 @@ def _generate_comprehensive_tips(severity: str, damages: List[str], cars_involve
         "Write down your own account of what happened as soon as possible while it's fresh in your mind."
     ])
 
-    if cars_involved > 1:
+    if multiple_cars:
         tips.extend([
             "Avoid admitting fault. Stick to the facts when speaking with other drivers and the police.",
             "Get contact information for any witnesses who saw the accident."
         ])
 
-    if any("tire" in d.lower() for d in damages):
+    if tire_damage:
         tips.append("When getting a tire replaced, ask the shop to check your vehicle's alignment as well, as impacts can throw it off.")
 
-    if severity in ["major", "severe"]:
+    if serious:
         tips.append("Keep a detailed log of all medical visits, expenses, and days missed from work if you are injured.")
     
     # Insurance and financial tips
@@ -537,68 +769,435 @@ def _generate_comprehensive_tips(severity: str, damages: List[str], cars_involve
         "Get at least two independent repair estimates before committing to a shop."
     ])
         
-    return tips[:8] # Limit to most important tips
+    return tuple(tips[:8]) # Limit to most important tips
+
+# The tips only depend on three flags, so all eight combinations are assembled once at import
+_TIPS_TABLE = {
+    (multiple_cars, tire_damage, serious): _build_tips(multiple_cars, tire_damage, serious)
+    for multiple_cars in (False, True) for tire_damage in (False, True) for serious in (False, True)
+}
+
+def _generate_comprehensive_tips(severity: str, has_tire_damage: bool, cars_involved: int) -> List[str]:
+    """Generate comprehensive, actionable tips based on the full situation analysis"""
+    return list(_TIPS_TABLE[(cars_involved > 1, has_tire_damage, severity in ("major", "severe"))])
+
+def _audio_mime_type(audio_path: str) -> str:
+    """Resolve the audio MIME type from the file suffix, defaulting to webm recordings"""
+    mime_type = _AUDIO_MIME_TYPES.get(os.fspath(audio_path).rpartition(".")[2].lower())
+    if mime_type:
+        return mime_type
+    guessed = mimetypes.guess_type(audio_path)[0]
+    return guessed if guessed and guessed.startswith("audio/") else "audio/webm"
+
+def _media_digest(file_path: Union[str, bytes]) -> str:
+    """Content hash of a media file or in-memory media, used as a cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(file_path, bytes):
+        digest.update(file_path)
+        return digest.hexdigest()
+    with open(file_path, "rb") as media_file:
+        size = os.fstat(media_file.fileno()).st_size
+        if size >= _MMAP_MIN_SIZE:
+            with mmap.mmap(media_file.fileno(), 0, access=mmap.ACCESS_READ) as media:
+                digest.update(media)
+        elif size:
+            digest.update(media_file.read())
+    return digest.hexdigest()
+
+def _iter_base64(file_path: Union[str, bytes]) -> Iterator[bytes]:
+    """Base64-encode a file or in-memory media, chunk by chunk straight from its memory map when it is large"""
+    if isinstance(file_path, bytes):
+        yield _b64encode(file_path)
+        return
+    with open(file_path, "rb") as media_file:
+        size = os.fstat(media_file.fileno()).st_size
+        if size < _MMAP_MIN_SIZE:
+            yield _b64encode(media_file.read())
+            return
+        with mmap.mmap(media_file.fileno(), 0, access=mmap.ACCESS_READ) as media, memoryview(media) as view:
+            for offset in range(0, size, _BASE64_CHUNK):
+                yield _b64encode(view[offset:offset + _BASE64_CHUNK])
+
+def _encode_file_base64(file_path: str) -> str:
+    """Base64-encode a whole file into a string"""
+    return b"".join(_iter_base64(file_path)).decode("ascii")
+
+def _serialize_request(payload: Dict, file_path: Union[str, bytes]) -> bytes:
+    """Serialize a request body, splicing the media's base64 in place of the inline media marker"""
+    body = orjson.dumps(payload)
+    head, marker, tail = body.partition(_INLINE_MEDIA_MARKER)
+    if not marker:
+        return body
+    # The encoded chunks go straight into the body, never into a str or through the JSON encoder
+    return b"".join([head, *_iter_base64(file_path), tail])
 
-def agent_transcribe_audio(audio_path: str) -> str:
+# With read/seek/tell and a length, requests sends this with a Content-Length straight
+# from the file, and urllib3 can rewind it when a retry replays the upload
+class _MultipartUpload:
+    """Seekable multipart/related upload body: JSON metadata part, raw file bytes, closing boundary"""
+
+    def __init__(self, file_path: str, mime_type: str):
+        self.boundary = uuid.uuid4().hex
+        metadata = orjson.dumps({"file": {"display_name": os.path.basename(file_path)}}).decode("utf-8")
+        self._head = (
+            f"--{self.boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n{metadata}\r\n"
+            f"--{self.boundary}\r\nContent-Type: {mime_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._file = open(file_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Serve the media bytes from the page cache instead of seek + read copies
+        self._media = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._file_end = len(self._head) + size
+        self._length = self._file_end + len(self._tail)
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: self._length}[whence]
+        self._pos = min(max(base + offset, 0), self._length)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length - self._pos
+        pieces = []
+        while size > 0 and self._pos < self._length:
+            if self._pos < len(self._head):
+                piece = self._head[self._pos:self._pos + size]
+            elif self._pos < self._file_end:
+                start = self._pos - len(self._head)
+                piece = self._media[start:start + min(size, self._file_end - self._pos)]
+            else:
+                start = self._pos - self._file_end
+                piece = self._tail[start:start + size]
+            pieces.append(piece)
+            self._pos += len(piece)
+            size -= len(piece)
+        return pieces[0] if len(pieces) == 1 else b"".join(pieces)
+
+    def close(self):
+        if isinstance(self._media, mmap.mmap):
+            self._media.close()
+        self._file.close()
+
+def _wait_until_active(gemini_file: Dict, api_key: str, timeout: float = 30.0) -> bool:
+    """Poll an uploaded file until Gemini has finished processing it"""
+    deadline = time.monotonic() + timeout
+    file_url = f"{GEMINI_API_ROOT}/v1beta/{gemini_file['name']}"
+    while gemini_file.get("state") == "PROCESSING":
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(1)
+        response = _gemini_session.get(file_url, params={"key": api_key}, timeout=(_CONNECT_TIMEOUT, 10))
+        # An error body carries no state, which must not pass for a finished file
+        if response.status_code != 200:
+            logger.error("Gemini file poll error: %s - %s", response.status_code, response.text)
+            return False
+        gemini_file = orjson.loads(response.content)
+    return gemini_file.get("state") == "ACTIVE"
+
+def _upload_to_gemini(file_path: str, mime_type: str, api_key: str, digest: Optional[str] = None) -> Optional[str]:
+    """Upload a media file through the Gemini Files API and return its file URI"""
+    # Keyed by content so a re-submitted clip reuses its earlier upload
+    cache_key = (digest or _media_digest(file_path), mime_type)
+    with _uploaded_files_lock:
+        cached = _uploaded_files.get(cache_key)
+        if cached and time.time() - cached[1] < _UPLOAD_CACHE_TTL:
+            _uploaded_files.move_to_end(cache_key)
+            return cached[0]
+
+    body = _MultipartUpload(file_path, mime_type)
+    headers = {
+        "X-Goog-Upload-Protocol": "multipart",
+        "Content-Type": f"multipart/related; boundary={body.boundary}"
+    }
+    try:
+        response = _gemini_session.post(GEMINI_UPLOAD_URL, params={"key": api_key}, headers=headers, data=body, timeout=(_CONNECT_TIMEOUT, 60))
+        if response.status_code != 200:
+            logger.error("Gemini file upload error: %s - %s", response.status_code, response.text)
+            return None
+        
+        # Video needs server-side processing before it can be referenced
+        gemini_file = orjson.loads(response.content)["file"]
+        if not _wait_until_active(gemini_file, api_key):
+            logger.error("Gemini file %s did not become active", gemini_file.get("name"))
+            return None
+    except requests.RequestException as e:
+        logger.error("Gemini file upload failed: %s", e)
+        return None
+    finally:
+        body.close()
+
+    file_uri = gemini_file["uri"]
+    logger.debug("Uploaded %s to Gemini as %s", file_path, file_uri)
+
+    with _uploaded_files_lock:
+        _uploaded_files[cache_key] = (file_uri, time.time())
+        if len(_uploaded_files) > _UPLOAD_CACHE_SIZE:
+            _uploaded_files.popitem(last=False)
+    return file_uri
+
+def _transcription_request(audio_path: str, api_key: str, inline_data: Optional[str] = None, digest: Optional[str] = None) -> Dict:
+    """Read the audio and build the generateContent request for it, inline_data overrides the encoded audio"""
+    mime_type = _audio_mime_type(audio_path)
+    
+    # Large recordings go through the Files API so we skip the base64 inflation
+    file_uri = None
+    if os.path.getsize(audio_path) > INLINE_MEDIA_LIMIT:
+        file_uri = _upload_to_gemini(audio_path, mime_type, api_key, digest)
+    
+    if file_uri:
+        media_part = {"file_data": {"mime_type": mime_type, "file_uri": file_uri}}
+    else:
+        media_part = {"inline_data": {"mime_type": mime_type, "data": inline_data or _encode_file_base64(audio_path)}}
+    
+    payload = {
+        "contents": [{
+            "parts": [
+                _TRANSCRIBE_PROMPT_PART,
+                media_part
+            ]
+        }]
+    }
+    return payload
+
+def _prepare_transcription_payload(audio_path: str, api_key: str, digest: Optional[str] = None) -> bytes:
+    """Read the audio and build the serialized generateContent request body"""
+    return _serialize_request(_transcription_request(audio_path, api_key, _INLINE_MEDIA_MARKER.decode("ascii"), digest), audio_path)
+
+def _request_transcription(body: bytes, api_key: str) -> str:
+    """Send a prepared transcription request to Gemini and extract the text"""
+    try:
+        response = _gemini_session.post(GEMINI_GENERATE_URL, params={"key": api_key, "fields": _TEXT_ONLY_FIELDS}, headers=_JSON_HEADERS, data=body, timeout=(_CONNECT_TIMEOUT, 20))
+    except requests.RequestException as e:
+        logger.error("Transcription failed: %s", e)
+        return _TRANSCRIBE_FAILED_ERROR
+    
+    if response.status_code != 200:
+        logger.error("Gemini API error: %s - %s", response.status_code, response.text)
+        return _TRANSCRIBE_HTTP_ERROR
+    
+    try:
+        transcription = orjson.loads(response.content)["candidates"][0]["content"]["parts"][0]["text"]
+    except (ValueError, KeyError, IndexError) as e:
+        logger.error("Unexpected Gemini transcription response: %s", e)
+        return _TRANSCRIBE_HTTP_ERROR
+    
+    logger.debug("Gemini transcription: %s", transcription)
+    return transcription.strip()
+
+def _cached_transcription(digest: str) -> Optional[str]:
+    """Look up a previous transcription of the same audio content"""
+    with _transcription_cache_lock:
+        return _transcription_cache.get(digest)
+
+def _remember_transcription(digest: str, transcription: str) -> str:
+    """Cache a successful transcription and pass it through"""
+    if transcription not in (_TRANSCRIBE_HTTP_ERROR, _TRANSCRIBE_FAILED_ERROR):
+        with _transcription_cache_lock:
+            _transcription_cache[digest] = transcription
+    return transcription
+
+def invalidate_transcription(digest: str) -> bool:
+    """Drop a cached transcription by audio content hash, returns whether it was cached"""
+    with _transcription_cache_lock:
+        return _transcription_cache.pop(digest, None) is not None
+
+def _transcribe_with_gemini(audio_path: str) -> str:
     """Transcribe audio using Gemini API"""
-    print(f"[DEBUG] Transcribing audio at {audio_path}")
+    logger.debug("Transcribing audio at %s", audio_path)
+    
+    digest = _media_digest(audio_path)
+    cached = _cached_transcription(digest)
+    if cached is not None:
+        logger.debug("Transcription cache hit for %s", digest)
+        return cached
     
-    api_key = os.getenv("GEMINI_API_KEY")
+    body = _prepare_transcription_payload(audio_path, GEMINI_API_KEY, digest)
+    return _remember_transcription(digest, _request_transcription(body, GEMINI_API_KEY))
+
+def _mock_transcription(audio_path: str) -> str:
+    """Fallback mock transcription when no Gemini key is configured"""
+    logger.debug("Transcribing audio at %s", audio_path)
+    transcription = next(_mock_transcriptions)
+    logger.debug("Mock transcription: %s", transcription)
+    return transcription
+
+# The key can't change at runtime, so pick the implementation once instead of checking per call
+agent_transcribe_audio = _transcribe_with_gemini if GEMINI_API_KEY else _mock_transcription
+
+async def agent_transcribe_audio_async(audio_path: str) -> str:
+    """Transcribe audio without blocking the event loop"""
+    api_key = GEMINI_API_KEY
     if not api_key:
-        mock_transcriptions = [
-            "I just had a minor accident on 5th Street. My front bumper is dented but everyone is okay.",
-            "There was a collision at the intersection. No injuries but my car won't start.",
-            "I hit a pothole and now my tire is flat. I'm on the side of Highway 95.",
-        ]
-        transcription = random.choice(mock_transcriptions)
-        print(f"[DEBUG] Mock transcription: {transcription}")
-        return transcription
+        return _mock_transcription(audio_path)
+    
+    logger.debug("Transcribing audio at %s", audio_path)
+    
+    # Hashing and encoding run on the bounded encode pool and anything that waits on the network
+    # on a plain worker thread, so a batch overlaps one file's preparation with another's network wait
+    loop = asyncio.get_running_loop()
+    digest = await loop.run_in_executor(_encode_pool, _media_digest, audio_path)
+    cached = _cached_transcription(digest)
+    if cached is not None:
+        logger.debug("Transcription cache hit for %s", digest)
+        return cached
+    
+    if os.path.getsize(audio_path) > INLINE_MEDIA_LIMIT:
+        # Large audio goes through the Files API upload and its processing poll, no encoding to do
+        body = await asyncio.to_thread(_prepare_transcription_payload, audio_path, api_key, digest)
+    else:
+        body = await loop.run_in_executor(_encode_pool, _prepare_transcription_payload, audio_path, api_key, digest)
+    return _remember_transcription(digest, await asyncio.to_thread(_request_transcription, body, api_key))
 
-    try:
-        with open(audio_path, "rb") as audio_file:
-            audio_data = base64.b64encode(audio_file.read()).decode('utf-8')
-        
-        mime_type = "audio/webm"
-        
-        payload = {
-            "contents": [{
-                "parts": [
-                    {"text": "Please transcribe this audio clearly and accurately. Focus on accident-related details:"},
-                    {"inline_data": {"mime_type": mime_type, "data": audio_data}}
-                ]
-            }]
-        }
-        
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-        response = requests.post(url, headers={"Content-Type": "application/json"}, json=payload, timeout=20)
-        
+async def transcribe_batch(audio_paths: List[str]) -> List[str]:
+    """Transcribe several audio files concurrently, results in input order"""
+    return list(await asyncio.gather(*(agent_transcribe_audio_async(path) for path in audio_paths)))
+
+def transcribe_batch_sync(audio_paths: List[str]) -> List[str]:
+    """Blocking wrapper around transcribe_batch for callers without an event loop"""
+    return asyncio.run(transcribe_batch(audio_paths))
+
+def _run_gemini_batch(requests_path: str, api_key: str, poll_interval: float, timeout: float) -> Optional[Dict[str, Dict]]:
+    """Submit a JSONL request file to the Gemini Batch API and return the responses by key"""
+    file_uri = _upload_to_gemini(requests_path, "application/jsonl", api_key)
+    if not file_uri:
+        return None
+    
+    batch_request = {"batch": {"display_name": "respondr-transcriptions", "input_config": {"file_name": f"files/{file_uri.rsplit('/', 1)[-1]}"}}}
+    response = _gemini_session.post(GEMINI_BATCH_URL, params={"key": api_key}, headers=_JSON_HEADERS, data=orjson.dumps(batch_request), timeout=(_CONNECT_TIMEOUT, 60))
+    if response.status_code != 200:
+        logger.error("Gemini batch creation error: %s - %s", response.status_code, response.text)
+        return None
+    batch_name = orjson.loads(response.content)["name"]
+    logger.debug("Submitted Gemini batch %s", batch_name)
+    
+    deadline = time.monotonic() + timeout
+    while True:
+        response = _gemini_session.get(f"{GEMINI_API_ROOT}/v1beta/{batch_name}", params={"key": api_key}, timeout=(_CONNECT_TIMEOUT, 30))
         if response.status_code == 200:
-            result = response.json()
-            transcription = result["candidates"][0]["content"]["parts"][0]["text"]
-            print(f"[DEBUG] Gemini transcription: {transcription}")
-            return transcription.strip()
+            batch = orjson.loads(response.content)
+            state = batch.get("metadata", {}).get("state")
+            if batch.get("done") or state in _BATCH_FINAL_STATES:
+                break
+        elif response.status_code in _RETRYABLE_STATUS:
+            # The session already retried this poll, the batch itself may still be fine
+            state = None
+            logger.warning("Gemini batch %s poll error: %s", batch_name, response.status_code)
         else:
-            print(f"[ERROR] Gemini API error: {response.status_code} - {response.text}")
-            return "Error: Could not transcribe audio"
-            
-    except Exception as e:
-        print(f"[ERROR] Transcription failed: {e}")
-        return "Error: Transcription failed"
+            logger.error("Gemini batch %s poll error: %s - %s", batch_name, response.status_code, response.text)
+            return None
+        if time.monotonic() > deadline:
+            logger.error("Gemini batch %s still %s after %ss", batch_name, state, timeout)
+            return None
+        time.sleep(poll_interval)
+    
+    responses_file = batch.get("response", {}).get("responsesFile")
+    if state != "BATCH_STATE_SUCCEEDED" or not responses_file:
+        logger.error("Gemini batch %s finished as %s: %s", batch_name, state, batch.get("error"))
+        return None
+    
+    download = _gemini_session.get(f"{GEMINI_API_ROOT}/download/v1beta/{responses_file}:download", params={"key": api_key, "alt": "media"}, timeout=(_CONNECT_TIMEOUT, 120))
+    if download.status_code != 200:
+        logger.error("Gemini batch download error: %s - %s", download.status_code, download.text)
+        return None
+    return {item["key"]: item for item in map(orjson.loads, download.content.splitlines()) if "key" in item}
+
+def transcribe_batch_offline(audio_paths: List[str], poll_interval: float = 30.0, timeout: float = 24 * 3600) -> List[str]:
+    """Transcribe a backlog of recordings through Gemini's Batch API, results in input order"""
+    api_key = GEMINI_API_KEY
+    if not api_key:
+        return [agent_transcribe_audio(path) for path in audio_paths]
+    
+    digests = [_media_digest(path) for path in audio_paths]
+    results = [_cached_transcription(digest) for digest in digests]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+    
+    # One JSONL line per recording, keyed by its position in audio_paths
+    with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as requests_file:
+        for i in pending:
+            requests_file.write(orjson.dumps({"key": str(i), "request": _transcription_request(audio_paths[i], api_key, digest=digests[i])}) + b"\n")
+    try:
+        responses = _run_gemini_batch(requests_file.name, api_key, poll_interval, timeout)
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        logger.error("Gemini batch transcription failed: %s", e)
+        responses = None
+    finally:
+        os.remove(requests_file.name)
+    
+    if responses is None:
+        return [result if result is not None else _TRANSCRIBE_FAILED_ERROR for result in results]
+    
+    for i in pending:
+        try:
+            transcription = responses[str(i)]["response"]["candidates"][0]["content"]["parts"][0]["text"].strip()
+        except (KeyError, IndexError):
+            transcription = _TRANSCRIBE_HTTP_ERROR
+        results[i] = _remember_transcription(digests[i], transcription)
+    return results
+
+async def transcribe_batch_offline_async(audio_paths: List[str], poll_interval: float = 30.0, timeout: float = 24 * 3600) -> List[str]:
+    """Run transcribe_batch_offline in a worker thread so the event loop stays free"""
+    return await asyncio.to_thread(transcribe_batch_offline, audio_paths, poll_interval, timeout)
 
 def generate_chat_response(message: str, last_analysis: Optional[Dict], session_history: List[Dict] = None) -> str:
     """Enhanced chat response generation with intelligent location search triggering"""
+    if not last_analysis:
+        return "I don't have any previous analysis to reference. Please start a new analysis with a video."
     
+    # The reply only depends on the message and the assessed severity and damages,
+    # so a question that was already answered for the same assessment comes from the memo
+    final_assessment = last_analysis.get("final_assessment", {})
     message_lower = message.lower()
+    return _memo_for(_chat_response, message_lower)(message_lower, final_assessment.get("severity"), tuple(final_assessment.get("damages", [])))
+
+# A listing depends on nothing but the service type, so it is rendered on first use and kept
+@lru_cache(maxsize=None)
+def _location_listing(service_type: str) -> str:
+    """Render the chat listing of the top services for a service type"""
+    location_info = agent_location_search(service_type, "Miami, FL")
     
-    if not last_analysis:
-        return "I don't have any previous analysis to reference. Please start a new analysis with a video."
+    # Create rich location response
+    services = location_info.get("services", [])[:3]  # Top 3 services
+    service_display_name = service_type.replace("_", " ").title()
     
-    # Analyze the user's query
-    query_analysis = agent_intelligent_query_analyzer(message, {"analysis": last_analysis})
+    location_lines = [f"I found several {service_display_name.lower()} options near you:\n\n"]
+    
+    for i, service in enumerate(services, 1):
+        location_lines.append(
+            f"{i}. **{service['name']}** ({service['distance']})\n"
+            f"   📍 {service['address']}\n"
+            f"   📞 {service['phone']}\n"
+            f"   ⏰ {service.get('hours', 'Call for hours')}\n"
+            f"   💰 {service.get('price_range', 'Call for pricing')}\n"
+        )
+        if service.get('wait_time'):
+            location_lines.append(f"   ⏱️ Typical wait: {service['wait_time']}\n")
+        location_lines.append("\n")
+    
+    return "".join(location_lines)
+
+@lru_cache(maxsize=1024)
+def _chat_response(message_lower: str, assessed_severity: Optional[str], assessed_damages: tuple) -> str:
+    """Build the chat reply for a lowercased message against the last assessment"""
+    final_assessment = {"damages": list(assessed_damages)}
+    if assessed_severity is not None:
+        final_assessment["severity"] = assessed_severity
+    
+    # Analyze the user's query, the memoized analysis is only read here so it needs no copy
+    query_analysis = _memo_for(_analyze_query, message_lower)(message_lower, _query_context_key(final_assessment))
     
     # Get context from last analysis
-    severity = last_analysis.get("final_assessment", {}).get("severity", "unknown")
-    damages = last_analysis.get("final_assessment", {}).get("damages", [])
+    severity = final_assessment.get("severity", "unknown")
+    damages = final_assessment["damages"]
     
     # Build contextual response
     response_parts = []
@@ -627,25 +1226,7 @@ def generate_chat_response(message: str, last_analysis: Optional[Dict], session_
     if query_analysis["needs_location_search"]:
         if query_analysis["search_types"]:
             service_type = query_analysis["search_types"][0]  # Use first/primary type
-            location_info = agent_location_search(service_type, "Miami, FL")
-            
-            # Create rich location response
-            services = location_info.get("services", [])[:3]  # Top 3 services
-            service_display_name = service_type.replace("_", " ").title()
-            
-            location_response = f"I found several {service_display_name.lower()} options near you:\n\n"
-            
-            for i, service in enumerate(services, 1):
-                location_response += f"{i}. **{service['name']}** ({service['distance']})\n"
-                location_response += f"   📍 {service['address']}\n"
-                location_response += f"   📞 {service['phone']}\n"
-                location_response += f"   ⏰ {service.get('hours', 'Call for hours')}\n"
-                location_response += f"   💰 {service.get('price_range', 'Call for pricing')}\n"
-                if service.get('wait_time'):
-                    location_response += f"   ⏱️ Typical wait: {service['wait_time']}\n"
-                location_response += "\n"
-            
-            response_parts.append(location_response)
+            response_parts.append(_location_listing(service_type))
             
             # Add contextual advice based on service type
             if service_type == "tire_shop":
@@ -659,13 +1240,18 @@ def generate_chat_response(message: str, last_analysis: Optional[Dict], session_
         else:
             response_parts.append("I can help you find local services. What type of service do you need? (mechanic, tire shop, body shop, towing, etc.)")
     
-    # General conversational responses
-    if not response_parts:
-        if any(word in message_lower for word in ["thank", "thanks"]):
-            response_parts.append("You're welcome! I'm here to help you through this situation. Do you have any other questions about next steps or need help finding local services?")
-        elif any(word in message_lower for word in ["help", "what", "how"]):
-            response_parts.append("I can help you with next steps, finding local services, insurance guidance, or cost estimates. What specific information would be most helpful right now?")
-        else:
-            response_parts.append("I understand you're dealing with the aftermath of your accident. I can provide more details about next steps, help you find local services, or answer questions about the repair process. What would be most helpful?")
+    if response_parts:
+        return "\n".join(response_parts)
     
-    return "\n".join(response_parts)
\ No newline at end of file
+    # General conversational responses
+    if any(word in message_lower for word in _THANKS_WORDS):
+        return "You're welcome! I'm here to help you through this situation. Do you have any other questions about next steps or need help finding local services?"
+    if any(word in message_lower for word in _HELP_WORDS):
+        return "I can help you with next steps, finding local services, insurance guidance, or cost estimates. What specific information would be most helpful right now?"
+    return "I understand you're dealing with the aftermath of your accident. I can provide more details about next steps, help you find local services, or answer questions about the repair process. What would be most helpful?"
+
+def close_agents() -> None:
+    """Release the pooled Gemini connections on shutdown"""
+    # The session reconnects on its next request, while a shut down encode pool would refuse work
+    # for good, so the pool is left to interpreter exit in case the app starts up again in this process
+    _gemini_session.close()
@@ -0,0 +1,39 @@
+# server/agents_pipeline.py
+import asyncio
+from typing import Dict, Optional
+from agents import (
+    agent_analyze_video_async,
+    agent_analyze_text,
+    agent_decision_maker,
+    agent_transcribe_audio_async,
+    TRANSCRIBE_ERRORS
+)
+
+async def run_incident(video_path: str, note: str = "", audio_path: Optional[str] = None, video_data: Optional[bytes] = None) -> Dict:
+    """Run the incident agents, overlapping the independent Gemini calls"""
+    if audio_path:
+        video_analysis, transcription = await asyncio.gather(
+            agent_analyze_video_async(video_path, video_data),
+            agent_transcribe_audio_async(audio_path)
+        )
+    else:
+        video_analysis, transcription = await agent_analyze_video_async(video_path, video_data), ""
+    
+    # The spoken description feeds the text analysis, so it has to wait for the transcription
+    if transcription in TRANSCRIBE_ERRORS:
+        transcription = ""
+    text_analysis = agent_analyze_text(f"{note} {transcription}".strip() if transcription else note)
+    
+    # Decision making is cheap CPU work, no need to leave the loop for it
+    decision = agent_decision_maker(video_analysis, text_analysis, None)
+    
+    return {
+        "video": video_analysis,
+        "text": text_analysis,
+        "transcription": transcription,
+        "decision": decision
+    }
+
+def run_incident_sync(video_path: str, note: str = "", audio_path: Optional[str] = None, video_data: Optional[bytes] = None) -> Dict:
+    """Blocking wrapper around run_incident for callers without an event loop"""
+    return asyncio.run(run_incident(video_path, note, audio_path, video_data))
@@ -1,26 +1,87 @@
 # server/main.py
 from fastapi import FastAPI, UploadFile, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
-import shutil, os
-from typing import Dict, List, Optional
+from cachetools import LRUCache
+import asyncio
+import hashlib
+import itertools
+import shutil, os, sys
+import io
+import logging
+import secrets
+import orjson
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+# Load environment variables from .env file before the agents read their settings
+load_dotenv()
+
 from agents import (
-    agent_analyze_video,
-    agent_analyze_text,
-    agent_decision_maker,
     agent_location_search,
-    agent_transcribe_audio,
+    agent_transcribe_audio_async,
     agent_intelligent_query_analyzer,
-    generate_chat_response
+    generate_chat_response,
+    close_agents
 )
+from agents_pipeline import run_incident
 
-# Load environment variables from .env file
-load_dotenv()
+# LOG_LEVEL=DEBUG turns on the agents' debug output
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+# Uploads are spooled here while the agents work on them
+UPLOAD_DIR = "uploads"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    yield
+    # Close the pooled Gemini connections instead of leaving them to the interpreter exit
+    close_agents()
+
+class OrjsonResponse(JSONResponse):
+    """JSON response serialized by orjson"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+# Every endpoint answers through orjson
+app = FastAPI(lifespan=lifespan, default_response_class=OrjsonResponse)
+
+# Session history entries are slotted records, orjson serializes them in field order like the dicts they replace
+@dataclass(slots=True, kw_only=True)
+class AnalysisEntry:
+    """An /analyze run stored in a chat session"""
+    type: str = "analysis"
+    user_input: Dict
+    ai_response: Dict
+    context: Dict
 
-app = FastAPI()
+@dataclass(slots=True, kw_only=True)
+class ChatEntry:
+    """A /chat turn stored in a chat session"""
+    type: str = "chat"
+    user_message: str
+    ai_response: str
+    location_data: Optional[Dict]
+    query_analysis: Dict
+    timestamp: str = "now"
 
-# Simple in-memory storage for chat sessions
-chat_sessions: Dict[str, List[Dict]] = {}
+@dataclass(slots=True)
+class ChatSession:
+    """A session's turns plus the latest analysis, so /chat never scans the history for it"""
+    turns: List[Union[AnalysisEntry, ChatEntry]] = field(default_factory=list)
+    last_analysis: Optional[AnalysisEntry] = None
+
+# Simple in-memory storage for chat sessions, the least recently used are dropped past the limit
+MAX_CHAT_SESSIONS = 1024
+chat_sessions: "LRUCache[str, ChatSession]" = LRUCache(maxsize=MAX_CHAT_SESSIONS)
+# Session numbers keep counting up so an evicted or deleted session's id is never handed out again
+_session_numbers = itertools.count()
+# /chat replies carry only the most recent part of the history, the full log is at GET /chat/{session_id}
+CHAT_REPLY_HISTORY = 10
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -31,85 +92,158 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Uploads are copied to disk in 1 MiB chunks rather than shutil's 64 KiB default
+_SPOOL_CHUNK = 1024 * 1024
+
+def _upload_path(upload: UploadFile, prefix: str = "") -> str:
+    """Spool path for an upload, unique per request and safe whatever the client sent as filename"""
+    filename = upload.filename or ""
+    # The agents pick the MIME type from the suffix, so a plain short extension is kept
+    extension = os.path.splitext(filename)[1].lower()
+    if not (extension[1:].isalnum() and len(extension) <= 8):
+        extension = ""
+    name_hash = hashlib.blake2b(filename.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+    return f"{UPLOAD_DIR}/{prefix}{name_hash}_{secrets.token_hex(4)}{extension}"
+
+_FILE_SENDFILE = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+
+def _sendfile_to(buffer, source, source_fd: int) -> bool:
+    """Copy the rest of source into buffer with sendfile, False when the filesystem refuses it up front"""
+    offset = source.tell()
+    # Reserve the whole destination up front so the filesystem allocates it in one go
+    remaining = os.fstat(source_fd).st_size - offset
+    if remaining > 0 and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(buffer.fileno(), 0, remaining)
+        except OSError:
+            pass
+    try:
+        sent = os.sendfile(buffer.fileno(), source_fd, offset, _SPOOL_CHUNK)
+    except OSError:
+        # Nothing was written yet, the caller copies through Python instead
+        return False
+    while sent:
+        offset += sent
+        sent = os.sendfile(buffer.fileno(), source_fd, offset, _SPOOL_CHUNK)
+    source.seek(offset)
+    return True
+
+def _spool(upload: UploadFile, path: str) -> None:
+    """Save an uploaded file to disk, blocking, so handlers run it on a worker thread"""
+    source = upload.file
+    with open(path, "wb") as buffer:
+        # Large uploads are already rolled over to a temp file, the kernel can copy those without
+        # bouncing through Python. Asking an in-memory spool for fileno() would force it to disk first.
+        # Like shutil, only Linux is trusted with file-to-file sendfile (macOS only sends to sockets).
+        if _FILE_SENDFILE and getattr(source, "_rolled", True):
+            try:
+                source_fd = source.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                source_fd = None
+            if source_fd is not None and _sendfile_to(buffer, source, source_fd):
+                return
+        shutil.copyfileobj(source, buffer, _SPOOL_CHUNK)
+
+# Load balancers probe these constantly, so the fixed payloads are serialized once at import
+_HEALTH_BYTES = orjson.dumps({"status": "ok", "message": "Respondr backend running with Enhanced AI Analysis"})
+
 @app.get("/")
 def health_check():
-    return {"status": "ok", "message": "Respondr backend running with Enhanced AI Analysis"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 @app.post("/transcribe")
 async def transcribe_audio(audio: UploadFile):
     """Transcribe audio using Gemini"""
-    save_path = f"uploads/audio_{audio.filename}"
-    os.makedirs("uploads", exist_ok=True)
-    
-    with open(save_path, "wb") as buffer:
-        shutil.copyfileobj(audio.file, buffer)
-    
-    transcription = agent_transcribe_audio(save_path)
+    # Nothing to transcribe, skip the disk write and the Gemini call
+    if audio.size == 0:
+        return {"transcription": ""}
     
-    # Clean up uploaded file
+    save_path = _upload_path(audio, "audio_")
     try:
-        os.remove(save_path)
-    except:
-        pass
+        await asyncio.to_thread(_spool, audio, save_path)
+        transcription = await agent_transcribe_audio_async(save_path)
+    finally:
+        # Clean up uploaded file
+        try:
+            os.remove(save_path)
+        except:
+            pass
     
     return {"transcription": transcription}
 
 @app.post("/analyze")
 async def analyze(
     video: UploadFile, 
+    audio: Optional[UploadFile] = None,
     note: str = Form(""),
     session_id: str = Form("new"),
     user_location: str = Form("Miami, FL")
 ):
     """Comprehensive accident analysis with enhanced location services"""
     
-    # Save video temporarily
-    save_path = f"uploads/{video.filename}"
-    os.makedirs("uploads", exist_ok=True)
-    with open(save_path, "wb") as buffer:
-        shutil.copyfileobj(video.file, buffer)
+    # A clip still in the upload's memory spool is analyzed from there, only rolled-over ones
+    # are saved to disk. An optional voice note is transcribed alongside the video analysis.
+    spools = []
+    if getattr(video.file, "_rolled", True):
+        video_data = None
+        save_path = _upload_path(video)
+        spools.append(asyncio.to_thread(_spool, video, save_path))
+    else:
+        video_data = await video.read()
+        save_path = None
+    if audio is not None:
+        audio_path = _upload_path(audio, "audio_")
+        spools.append(asyncio.to_thread(_spool, audio, audio_path))
+    else:
+        audio_path = None
     
     try:
-        # Run analysis agents
-        video_analysis = agent_analyze_video(save_path)
-        text_analysis = agent_analyze_text(note)
+        # Both spools finish before a failure is raised, so the cleanup below also removes the other one's file
+        for result in await asyncio.gather(*spools, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
         
-        # Generate decision and advice FIRST
-        decision = agent_decision_maker(video_analysis, text_analysis, None)
+        # Run analysis agents, then generate decision and advice FIRST
+        incident = await run_incident(save_path or video.filename or "", note, audio_path, video_data)
+        video_analysis = incident["video"]
+        text_analysis = incident["text"]
+        decision = incident["decision"]
         
         # Enhanced service search based on analysis
-        location_services = {}
         all_services = []
         seen_services = set()
         
         # Determine what services to search for based on decision
         search_queries = []
         location_recommendations = decision.get("location_recommendations", [])
+        # First recommendation per service type, the one the services get annotated with
+        rec_by_type = {rec["type"]: rec for rec in reversed(location_recommendations)}
         
         # Primary service determination based on severity and damage
         final_damages = decision.get("damages", [])
         severity = decision.get("severity", "minor")
+        overview_summary = decision.get("overview_summary")
+        priority = decision.get("priority", "medium")
+        # Lowercased once for the tire check here and the per-service advice below
+        damages_blob = str(final_damages).lower()
         
         if severity == "severe":
             search_queries.extend(["hospital", "tow_truck"])
-        elif any("tire" in damage.lower() for damage in final_damages):
+        elif "tire" in damages_blob:
             search_queries.extend(["tire_shop", "tow_truck"])
         elif severity == "major":
             search_queries.extend(["auto_body_shop", "tow_truck"])
         else:
             search_queries.append("mechanic")
         
-        # Add services from location recommendations
-        for rec in location_recommendations:
-            service_type = rec["type"]
-            if service_type not in search_queries:
-                search_queries.append(service_type)
+        # Add services from location recommendations, dict.fromkeys keeps the first of each in order
+        search_queries = list(dict.fromkeys(search_queries + [rec["type"] for rec in location_recommendations]))
         
-        # Search for services with enhanced data
-        for query in search_queries[:4]:  # Limit to 4 searches for performance
-            location_info = agent_location_search(query, user_location)
-            location_services[query] = location_info
-            
+        # Search for services with enhanced data. The searches are in-memory lookups over prebuilt
+        # results, so they run inline, a thread pool hop would cost more than the lookup itself.
+        location_services = {query: agent_location_search(query, user_location) for query in search_queries[:4]}  # Limit to 4 searches for performance
+        
+        for query, location_info in location_services.items():
             # Process services with contextual reasoning
             services_with_context = location_info.get("services", [])
             for service in services_with_context[:3]:  # Top 3 per category
@@ -119,19 +253,18 @@ async def analyze(
                     seen_services.add(service_id)
                     
                     # Add recommendation context
-                    for rec in location_recommendations:
-                        if rec["type"] == query:
-                            service["recommendation_reason"] = rec["reason"]
-                            service["priority"] = rec.get("priority", "normal")
-                            break
+                    rec = rec_by_type.get(query)
+                    if rec:
+                        service["recommendation_reason"] = rec["reason"]
+                        service["priority"] = rec.get("priority", "normal")
                     
                     # Add AI-generated contextual advice
-                    service["ai_advice"] = _generate_service_advice(service, decision)
+                    service["ai_advice"] = _generate_service_advice(service, decision, damages_blob)
                     
                     all_services.append(service)
         
         # Create session ID
-        new_session_id = f"session_{len(chat_sessions)}" if session_id == "new" else session_id
+        new_session_id = f"session_{next(_session_numbers)}" if session_id == "new" else session_id
         
         # Create comprehensive response
         response = {
@@ -139,13 +272,14 @@ async def analyze(
             "analysis": {
                 "video": video_analysis,
                 "text": text_analysis,
+                "transcription": incident["transcription"],
                 "decision": decision,
                 "final_assessment": {
-                    "severity": decision.get("severity"),
+                    "severity": severity,
                     "cars_involved": decision.get("cars_involved"),
-                    "damages": decision.get("damages"),
+                    "damages": final_damages,
                     "text_override_applied": decision.get("text_override_applied", False),
-                    "overview_summary": decision.get("overview_summary"),
+                    "overview_summary": overview_summary,
                     "detailed_explanation": decision.get("detailed_explanation")
                 }
             },
@@ -157,7 +291,7 @@ async def analyze(
                 "services": all_services[:6],  # Top 6 services across all categories
                 "comprehensive_tips": decision.get("comprehensive_tips", [])
             },
-            "priority": decision.get("priority", "medium"),
+            "priority": priority,
             "timestamp": "now",
             "context": {
                 "search_queries_used": search_queries,
@@ -166,79 +300,86 @@ async def analyze(
         }
         
         # Store in chat history with enhanced context
-        if new_session_id not in chat_sessions:
-            chat_sessions[new_session_id] = []
+        session = chat_sessions.get(new_session_id)
+        if session is None:
+            session = chat_sessions[new_session_id] = ChatSession()
         
-        chat_sessions[new_session_id].append({
-            "type": "analysis",
-            "user_input": {
+        session.last_analysis = AnalysisEntry(
+            user_input={
                 "video_filename": video.filename,
                 "note": note,
                 "location": user_location
             },
-            "ai_response": response,
-            "context": {
-                "analysis_summary": decision.get("overview_summary"),
-                "priority": decision.get("priority"),
+            ai_response=response,
+            context={
+                "analysis_summary": overview_summary,
+                "priority": priority,
                 "service_needs": search_queries
             }
-        })
+        )
+        session.turns.append(session.last_analysis)
         
-        return response
+        # Already plain JSON types, skip the jsonable_encoder pass over the whole analysis
+        return OrjsonResponse(response)
     
     finally:
-        # Clean up uploaded file
-        try:
-            os.remove(save_path)
-        except:
-            pass
+        # Clean up uploaded files
+        for path in (save_path, audio_path):
+            if path:
+                try:
+                    os.remove(path)
+                except:
+                    pass
 
-def _generate_service_advice(service: Dict, decision: Dict) -> str:
+# Per service type and severity advice for the services recommended after an analysis
+_ADVICE_TEMPLATES = {
+    "tire_shop": {
+        "minor": "Check if they can inspect your wheel alignment - impacts often affect it.",
+        "major": "Ask about emergency tire service and if they can check for suspension damage.",
+        "severe": "Call ahead - you may need emergency roadside tire replacement."
+    },
+    "tow_truck": {
+        "minor": "If driving safely, you may not need a tow. Get an estimate first.",
+        "major": "Request a flatbed tow to prevent further damage to your vehicle.",
+        "severe": "Priority emergency towing - mention if there are injuries involved."
+    },
+    "auto_body_shop": {
+        "minor": "Get a free estimate first before deciding on repairs vs. insurance claim.",
+        "major": "Ask about insurance direct billing and rental car arrangements.",
+        "severe": "Focus on certified collision centers experienced with major damage."
+    },
+    "mechanic": {
+        "minor": "Request a post-accident inspection even if damage looks minimal.",
+        "major": "Ask for a comprehensive diagnostic to check for hidden damage.",
+        "severe": "Ensure they're equipped to handle extensive mechanical damage."
+    },
+    "hospital": {
+        "minor": "Visit urgent care if you experience delayed pain or discomfort.",
+        "major": "Get checked even if you feel fine - adrenaline can mask injuries.",
+        "severe": "Call 911 or go to emergency room immediately."
+    }
+}
+
+def _generate_service_advice(service: Dict, decision: Dict, damages_blob: str) -> str:
     """Generate contextual advice for each service based on the accident analysis"""
     service_type = service.get("type", "")
     severity = decision.get("severity", "minor")
-    damages = decision.get("damages", [])
-    
-    advice_templates = {
-        "tire_shop": {
-            "minor": "Check if they can inspect your wheel alignment - impacts often affect it.",
-            "major": "Ask about emergency tire service and if they can check for suspension damage.",
-            "severe": "Call ahead - you may need emergency roadside tire replacement."
-        },
-        "tow_truck": {
-            "minor": "If driving safely, you may not need a tow. Get an estimate first.",
-            "major": "Request a flatbed tow to prevent further damage to your vehicle.",
-            "severe": "Priority emergency towing - mention if there are injuries involved."
-        },
-        "auto_body_shop": {
-            "minor": "Get a free estimate first before deciding on repairs vs. insurance claim.",
-            "major": "Ask about insurance direct billing and rental car arrangements.",
-            "severe": "Focus on certified collision centers experienced with major damage."
-        },
-        "mechanic": {
-            "minor": "Request a post-accident inspection even if damage looks minimal.",
-            "major": "Ask for a comprehensive diagnostic to check for hidden damage.",
-            "severe": "Ensure they're equipped to handle extensive mechanical damage."
-        },
-        "hospital": {
-            "minor": "Visit urgent care if you experience delayed pain or discomfort.",
-            "major": "Get checked even if you feel fine - adrenaline can mask injuries.",
-            "severe": "Call 911 or go to emergency room immediately."
-        }
-    }
     
     # Get specific advice based on service type and severity
-    service_advice = advice_templates.get(service_type, {})
+    service_advice = _ADVICE_TEMPLATES.get(service_type, {})
     advice = service_advice.get(severity, f"Contact them about your {severity} accident situation.")
     
     # Add damage-specific advice
-    if "tire" in str(damages).lower() and service_type == "tire_shop":
+    if "tire" in damages_blob and service_type == "tire_shop":
         advice += " Mention the tire damage when calling."
-    elif "engine" in str(damages).lower() and service_type == "mechanic":
+    elif "engine" in damages_blob and service_type == "mechanic":
         advice += " Specifically mention potential engine issues."
     
     return advice
 
+# Phrases that show a chat reply already talks about the services found
+_LOCATION_MENTIONS = frozenset({"found", "located", "here are"})
+
 @app.post("/chat")
 async def chat_followup(
     session_id: str = Form(...),
@@ -247,38 +388,48 @@ async def chat_followup(
 ):
     """Enhanced chat handler with intelligent location search and context awareness"""
     
-    if session_id not in chat_sessions:
+    # Hold on to the session itself, a delete or an eviction can land while the audio is awaited
+    session = chat_sessions.get(session_id)
+    if session is None:
         return {"error": "Session not found"}
     
+    # Empty turns (frontend probes) get the recent history back without running the agents or logging a turn
+    has_audio = audio is not None and audio.size != 0
+    if not has_audio and not message.strip():
+        return OrjsonResponse({
+            "session_id": session_id,
+            "response": "",
+            "location_data": None,
+            "chat_history": session.turns[-CHAT_REPLY_HISTORY:],
+            "query_analysis": None
+        })
+    
     # Process audio if provided
     transcribed_text = ""
-    if audio:
-        save_path = f"uploads/chat_audio_{audio.filename}"
-        os.makedirs("uploads", exist_ok=True)
-        with open(save_path, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
-        transcribed_text = agent_transcribe_audio(save_path)
-        
-        # Clean up uploaded file
+    if has_audio:
+        save_path = _upload_path(audio, "chat_audio_")
         try:
-            os.remove(save_path)
-        except:
-            pass
+            await asyncio.to_thread(_spool, audio, save_path)
+            transcribed_text = await agent_transcribe_audio_async(save_path)
+        finally:
+            # Clean up uploaded file
+            try:
+                os.remove(save_path)
+            except:
+                pass
     
     # Combine message and transcription
     full_message = f"{message} {transcribed_text}".strip()
     
     # Get chat history and context
-    chat_history = chat_sessions[session_id]
+    chat_history = session.turns
     
-    # Find the most recent analysis for context
+    # The most recent analysis for context
     last_analysis = None
     analysis_context = None
-    for entry in reversed(chat_history):
-        if entry["type"] == "analysis":
-            last_analysis = entry["ai_response"]["analysis"]
-            analysis_context = entry.get("context", {})
-            break
+    if session.last_analysis is not None:
+        last_analysis = session.last_analysis.ai_response["analysis"]
+        analysis_context = session.last_analysis.context
     
     # Use intelligent query analyzer to understand what user needs
     query_analysis = agent_intelligent_query_analyzer(full_message, {"analysis": last_analysis})
@@ -321,31 +472,29 @@ async def chat_followup(
     response_text = generate_chat_response(full_message, last_analysis, chat_history)
     
     # If we found location data but response doesn't mention it, enhance the response
-    if location_data and not any(word in response_text.lower() for word in ["found", "located", "here are"]):
+    if location_data and not any(word in response_text.lower() for word in _LOCATION_MENTIONS):
         service_count = len(location_data["services"])
         service_types = ", ".join([t.replace("_", " ") for t in location_data["search_types"]])
         response_text += f"\n\nI found {service_count} nearby {service_types} options for you. You can see them on the map below."
     
     # Store enhanced chat exchange
-    chat_entry = {
-        "type": "chat",
-        "user_message": full_message,
-        "ai_response": response_text,
-        "location_data": location_data,
-        "query_analysis": query_analysis,
-        "timestamp": "now"
-    }
+    chat_entry = ChatEntry(
+        user_message=full_message,
+        ai_response=response_text,
+        location_data=location_data,
+        query_analysis=query_analysis
+    )
     
-    chat_sessions[session_id].append(chat_entry)
+    chat_history.append(chat_entry)
     
-    # Return enhanced response
-    return {
+    # Return enhanced response, serialized by orjson directly instead of walking it through jsonable_encoder first
+    return OrjsonResponse({
         "session_id": session_id,
         "response": response_text,
         "location_data": location_data,
-        "chat_history": chat_sessions[session_id],
+        "chat_history": chat_history[-CHAT_REPLY_HISTORY:],
         "query_analysis": query_analysis  # For debugging/frontend optimization
-    }
+    })
 
 @app.get("/chat/{session_id}")
 async def get_chat_history(session_id: str):
@@ -353,10 +502,10 @@ async def get_chat_history(session_id: str):
     if session_id not in chat_sessions:
         return {"error": "Session not found"}
     
-    return {
+    return OrjsonResponse({
         "session_id": session_id,
-        "chat_history": chat_sessions[session_id]
-    }
+        "chat_history": chat_sessions[session_id].turns
+    })
 
 @app.get("/sessions")
 async def list_active_sessions():
@@ -375,27 +524,39 @@ async def delete_session(session_id: str):
     else:
         return {"error": "Session not found"}
 
-@app.get("/health")
-async def health_detailed():
-    """Detailed health check with environment info"""
-    gemini_key = os.getenv("GEMINI_API_KEY")
-    
-    return {
+_ACTIVE_SESSIONS_MARKER = "@@active-sessions@@"
+
+def _health_detailed_parts(gemini_api: str) -> List[bytes]:
+    """Pre-serialize the /health payload around the active session count"""
+    body = orjson.dumps({
         "status": "healthy",
         "services": {
-            "gemini_api": "available" if gemini_key else "mock_mode",
+            "gemini_api": gemini_api,
             "file_upload": "enabled",
             "chat_storage": "in_memory",
             "location_search": "enhanced_mock_data",
             "intelligent_query_analysis": "enabled"
         },
         "stats": {
-            "active_sessions": len(chat_sessions),
-            "upload_directory": "uploads/"
+            "active_sessions": _ACTIVE_SESSIONS_MARKER,
+            "upload_directory": f"{UPLOAD_DIR}/"
         },
         "features": {
             "smart_location_search": True,
             "contextual_chat": True,
             "enhanced_recommendations": True
         }
-    }
\ No newline at end of file
+    })
+    return body.split(orjson.dumps(_ACTIVE_SESSIONS_MARKER))
+
+# Keyed by whether a Gemini key is set, the key is still checked per request
+_HEALTH_DETAILED_PARTS = {
+    True: _health_detailed_parts("available"),
+    False: _health_detailed_parts("mock_mode"),
+}
+
+@app.get("/health")
+async def health_detailed():
+    """Detailed health check with environment info"""
+    head, tail = _HEALTH_DETAILED_PARTS[bool(os.getenv("GEMINI_API_KEY"))]
+    return Response(content=b"%b%d%b" % (head, len(chat_sessions), tail), media_type="application/json")
\ No newline at end of file